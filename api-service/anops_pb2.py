@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0b\x61nops.proto\x12\x05\x61nops\"$\n\x0ePredictRequest\x12\x12\n\ninput_data\x18\x01 \x01(\t\"&\n\x0fPredictResponse\x12\x13\n\x0boutput_data\x18\x01 \x01(\t2C\n\x05\x41nOps\x12:\n\x07Predict\x12\x15.anops.PredictRequest\x1a\x16.anops.PredictResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0b\x61nops.proto\x12\x05\x61nops\"$\n\x0ePredictRequest\x12\x12\n\ninput_data\x18\x01 \x01(\t\"&\n\x0fPredictResponse\x12\x13\n\x0boutput_data\x18\x01 \x01(\t\":\n\x0fPredictRequests\x12\'\n\x08requests\x18\x01 \x03(\x0b\x32\x15.anops.PredictRequest\"C\n\rPredictResult\x12\x13\n\x0boutput_data\x18\x01 \x01(\t\x12\x0c\n\x04\x63ode\x18\x02 \x01(\x05\x12\x0f\n\x07\x64\x65tails\x18\x03 \x01(\t\"9\n\x10PredictResponses\x12%\n\x07results\x18\x01 \x03(\x0b\x32\x14.anops.PredictResult2\x86\x01\n\x05\x41nOps\x12:\n\x07Predict\x12\x15.anops.PredictRequest\x1a\x16.anops.PredictResponse\"\x00\x12\x41\n\x0cPredictBatch\x12\x16.anops.PredictRequests\x1a\x17.anops.PredictResponses\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -35,6 +35,12 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_PREDICTREQUEST']._serialized_end=58
   _globals['_PREDICTRESPONSE']._serialized_start=60
   _globals['_PREDICTRESPONSE']._serialized_end=98
-  _globals['_ANOPS']._serialized_start=100
-  _globals['_ANOPS']._serialized_end=167
+  _globals['_PREDICTREQUESTS']._serialized_start=100
+  _globals['_PREDICTREQUESTS']._serialized_end=158
+  _globals['_PREDICTRESULT']._serialized_start=160
+  _globals['_PREDICTRESULT']._serialized_end=227
+  _globals['_PREDICTRESPONSES']._serialized_start=229
+  _globals['_PREDICTRESPONSES']._serialized_end=286
+  _globals['_ANOPS']._serialized_start=289
+  _globals['_ANOPS']._serialized_end=423
 # @@protoc_insertion_point(module_scope)
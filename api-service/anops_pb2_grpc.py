@@ -40,6 +40,11 @@ class AnOpsStub(object):
                 request_serializer=anops__pb2.PredictRequest.SerializeToString,
                 response_deserializer=anops__pb2.PredictResponse.FromString,
                 _registered_method=True)
+        self.PredictBatch = channel.unary_unary(
+                '/anops.AnOps/PredictBatch',
+                request_serializer=anops__pb2.PredictRequests.SerializeToString,
+                response_deserializer=anops__pb2.PredictResponses.FromString,
+                _registered_method=True)
 
 
 class AnOpsServicer(object):
@@ -53,6 +58,14 @@ class AnOpsServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def PredictBatch(self, request, context):
+        """Sends a batch of inputs for prediction as a single message, answered by
+        one PredictResponses message with a result per input.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_AnOpsServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -61,6 +74,11 @@ def add_AnOpsServicer_to_server(servicer, server):
                     request_deserializer=anops__pb2.PredictRequest.FromString,
                     response_serializer=anops__pb2.PredictResponse.SerializeToString,
             ),
+            'PredictBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.PredictBatch,
+                    request_deserializer=anops__pb2.PredictRequests.FromString,
+                    response_serializer=anops__pb2.PredictResponses.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'anops.AnOps', rpc_method_handlers)
@@ -99,3 +117,30 @@ class AnOps(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def PredictBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/anops.AnOps/PredictBatch',
+            anops__pb2.PredictRequests.SerializeToString,
+            anops__pb2.PredictResponses.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
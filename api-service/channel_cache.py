@@ -0,0 +1,100 @@
+import os
+import time
+import asyncio
+import logging
+
+import grpc
+
+import anops_pb2_grpc
+
+logger = logging.getLogger(__name__)
+
+# Channels that have not been used for this many seconds are closed by the
+# background reaper and transparently re-created on next use.
+CHANNEL_IDLE_TIMEOUT = float(os.getenv("CHANNEL_IDLE_TIMEOUT", "600"))
+
+# (target, options, compression) -> (channel, stub, last_used)
+_CHANNELS = {}
+_LOCK = asyncio.Lock()
+_reaper_task = None
+
+
+def _make_key(target, options, compression):
+    return (target, tuple(options or ()), compression)
+
+
+async def get_stub(target, options=None, compression=None):
+    """Return a cached AnOps stub for ``target``, opening a channel if needed.
+
+    Channels are keyed by target, channel options and compression, so callers
+    asking for the same configuration share one long-lived channel.
+    """
+    key = _make_key(target, options, compression)
+    entry = _CHANNELS.get(key)
+    if entry is None:
+        async with _LOCK:
+            # Another coroutine may have created it while we waited
+            entry = _CHANNELS.get(key)
+            if entry is None:
+                channel = grpc.aio.insecure_channel(
+                    target, options=list(key[1]), compression=compression
+                )
+                entry = (channel, anops_pb2_grpc.AnOpsStub(channel), None)
+                logger.info("Opened gRPC channel to %s", target)
+    channel, stub, _ = entry
+    _CHANNELS[key] = (channel, stub, time.monotonic())
+    return stub
+
+
+async def evict_idle(max_idle=None):
+    """Close and forget channels idle for longer than ``max_idle`` seconds."""
+    if max_idle is None:
+        max_idle = CHANNEL_IDLE_TIMEOUT
+    now = time.monotonic()
+    async with _LOCK:
+        expired = [
+            key
+            for key, (_, _, last_used) in _CHANNELS.items()
+            if now - last_used > max_idle
+        ]
+        channels = [_CHANNELS.pop(key)[0] for key in expired]
+    for key, channel in zip(expired, channels):
+        await channel.close()
+        logger.info("Closed idle gRPC channel to %s", key[0])
+    return len(expired)
+
+
+async def _reap_forever(interval):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await evict_idle()
+        except Exception as e:
+            logger.error("Failed to evict idle gRPC channels: %s", e, exc_info=True)
+
+
+def start_reaper(interval=None):
+    """Start the background task that closes idle channels."""
+    global _reaper_task
+    if _reaper_task is None or _reaper_task.done():
+        if interval is None:
+            interval = max(CHANNEL_IDLE_TIMEOUT / 2, 1.0)
+        _reaper_task = asyncio.get_running_loop().create_task(_reap_forever(interval))
+    return _reaper_task
+
+
+async def close_all():
+    """Stop the reaper and close every cached channel."""
+    global _reaper_task
+    if _reaper_task is not None:
+        _reaper_task.cancel()
+        try:
+            await _reaper_task
+        except asyncio.CancelledError:
+            pass
+        _reaper_task = None
+    async with _LOCK:
+        channels = [channel for channel, _, _ in _CHANNELS.values()]
+        _CHANNELS.clear()
+    for channel in channels:
+        await channel.close()
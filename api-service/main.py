@@ -1,6 +1,14 @@
 import os
+import asyncio
+import itertools
 import grpc
-from fastapi import FastAPI, HTTPException
+import orjson
+import redis
+import redis.asyncio
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from google.protobuf.internal import api_implementation
 from pydantic import BaseModel
 import logging
 from pythonjsonlogger import jsonlogger
@@ -13,7 +21,8 @@ logHandler = logging.FileHandler(log_file)
 formatter = jsonlogger.JsonFormatter()
 logHandler.setFormatter(formatter)
 logging.basicConfig(
-    level=logging.INFO,
+    # Set LOG_LEVEL=DEBUG to trace individual requests
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
     handlers=[logHandler],
     format=None,  # Formatter is set above
 )
@@ -24,15 +33,339 @@ logger = logging.getLogger(__name__)
 # This might require adjusting PYTHONPATH or copying files during build.
 # For simplicity, we'll assume they are in the same directory or PYTHONPATH.
 import anops_pb2
-import anops_pb2_grpc
+import channel_cache
 
-app = FastAPI()
+
+def check_protobuf_backend():
+    """Raise if protobuf is not using the backend the environment asked for.
+
+    With PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=upb but no C extension,
+    protobuf only warns and falls back to its pure-Python implementation.
+    """
+    requested = os.getenv("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION")
+    actual = api_implementation.Type()
+    if requested and actual != requested:
+        raise RuntimeError(
+            f"protobuf is using its {actual} backend, not the requested {requested}"
+        )
+
+
+check_protobuf_backend()
+
+# orjson encodes responses several times faster than the stdlib json module
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Get the model service URL from environment variable
 MODEL_SERVICE_URL = os.getenv("MODEL_SERVICE_URL", "localhost:50051")
 
 
-# Pydantic model for request body
+def grpc_target(url):
+    """Return ``url`` as an explicit gRPC target URI.
+
+    Bare ``host:port`` addresses get the ``dns:///`` scheme so the channel is
+    bound to the DNS resolver up front; URIs that already name a resolver
+    (``dns:``, ``ipv4:``, ``ipv6:``, ``unix:``...) are passed through as-is.
+    """
+    if "://" in url or url.startswith(("dns:", "ipv4:", "ipv6:", "unix:")):
+        return url
+    return f"dns:///{url}"
+
+
+# Parsed once at import; every channel in the pool uses this target
+MODEL_SERVICE_TARGET = grpc_target(MODEL_SERVICE_URL)
+
+# Number of independent channels (HTTP/2 connections) to the model service
+GRPC_POOL_SIZE = int(os.getenv("GRPC_POOL_SIZE", "4"))
+
+# Client-side HTTP/2 tuning, matching the model service's server options.
+# Keepalive pings detect dead connections before a request has to.
+GRPC_CHANNEL_OPTIONS = [
+    ("grpc.keepalive_time_ms", 20000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.http2.write_buffer_size", 1 << 20),
+    # Long-lived channels should not wake the DNS resolver more than this
+    ("grpc.dns_min_time_between_resolutions_ms", 30000),
+]
+
+
+class ChannelPool:
+    """Round-robins calls over several independent channels to one target.
+
+    A single HTTP/2 connection serialises every call behind the same flow
+    control window, so under concurrent load we spread them out. Each channel
+    gets a distinct ``grpc.channel_id`` arg, which stops gRPC from merging
+    them onto one shared subchannel.
+    """
+
+    def __init__(self, target, size, options=()):
+        self.target = target
+        self._options = [
+            [("grpc.channel_id", i), *options] for i in range(max(size, 1))
+        ]
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._options)
+
+    async def next(self):
+        """Return the stub for the next channel in round-robin order."""
+        options = self._options[next(self._counter) % len(self._options)]
+        return await channel_cache.get_stub(self.target, options=options)
+
+
+POOL = ChannelPool(MODEL_SERVICE_TARGET, GRPC_POOL_SIZE, GRPC_CHANNEL_OPTIONS)
+
+# Requests arriving within this window are coalesced into one gRPC message
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "1"))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "128"))
+
+# The model service rejects messages over gRPC's default 4 MiB receive limit
+GRPC_MAX_MESSAGE_BYTES = int(os.getenv("GRPC_MAX_MESSAGE_BYTES", str(4 << 20)))
+# Batches are flushed before their encoded inputs pass this many bytes, well
+# under GRPC_MAX_MESSAGE_BYTES. A larger input is sent in a batch of its own.
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(1 << 20)))
+
+# Maps the integer codes carried in PredictResult back to grpc.StatusCode
+_STATUS_CODES = {code.value[0]: code for code in grpc.StatusCode}
+
+
+def _result_error(result):
+    """Build the AioRpcError a failed PredictResult would have raised alone."""
+    code = _STATUS_CODES.get(result.code, grpc.StatusCode.UNKNOWN)
+    return grpc.aio.AioRpcError(
+        code, grpc.aio.Metadata(), grpc.aio.Metadata(), details=result.details
+    )
+
+
+def encoded_size(input_data):
+    """Upper bound on the bytes ``input_data`` adds to a PredictRequests."""
+    # UTF-8 payload plus the tags and length prefixes of the entry and field
+    return len(input_data.encode()) + 12
+
+
+async def predict_many(stub, inputs):
+    """Send ``inputs`` as one PredictRequests message; return its PredictResults."""
+    # Build entries in place instead of copying in standalone PredictRequests.
+    # The batch is not shared between calls: grpc serialises it only after
+    # an await, when a concurrent batch could already be refilling it.
+    batch = anops_pb2.PredictRequests()
+    add_request = batch.requests.add
+    for input_data in inputs:
+        add_request(input_data=input_data)
+    responses = await stub.PredictBatch(batch)
+    if len(responses.results) != len(inputs):
+        raise RuntimeError("Model service returned an incomplete batch")
+    return responses.results
+
+
+class RequestBatcher:
+    """Coalesces concurrent predictions into batched PredictBatch calls.
+
+    Inputs submitted within ``window`` seconds of the first queued one (up to
+    ``max_size`` of them, and ``max_bytes`` once encoded) are sent to the
+    model service as a single PredictRequests message, so throughput is not
+    capped by the per-message cost of unary RPCs. Batches are sent
+    concurrently over the channel pool.
+    """
+
+    def __init__(self, pool, window, max_size, max_bytes=BATCH_MAX_BYTES):
+        self.pool = pool
+        self.window = window
+        self.max_size = max(max_size, 1)
+        self.max_bytes = max_bytes
+        self._queue = None
+        self._task = None
+        self._inflight = set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop batching, wait for sent batches and cancel queued requests."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            future.cancel()
+
+    async def submit(self, input_data):
+        """Queue ``input_data`` for the next batch and return its output."""
+        if self._task is None:
+            raise RuntimeError("Request batcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((input_data, encoded_size(input_data), future))
+        return await future
+
+    async def _run(self):
+        overflow = None
+        while True:
+            if overflow is None:
+                items = [await self._queue.get()]
+                try:
+                    await asyncio.sleep(self.window)
+                except asyncio.CancelledError:
+                    for _, _, future in items:
+                        future.cancel()
+                    raise
+            else:
+                # Left over from a full batch; the rest are already queued
+                items, overflow = [overflow], None
+            size = items[0][1]
+            while len(items) < self.max_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if size + item[1] > self.max_bytes:
+                    overflow = item
+                    break
+                items.append(item)
+                size += item[1]
+            task = asyncio.get_running_loop().create_task(self._send(items))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, items):
+        logger.debug("Sending batch of %d to model service", len(items))
+        try:
+            stub = await self.pool.next()
+            results = await predict_many(
+                stub, [input_data for input_data, _, _ in items]
+            )
+        except Exception as e:
+            if (
+                isinstance(e, grpc.aio.AioRpcError)
+                and e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+                and len(items) > 1
+            ):
+                # Too large as a whole; retry each input so only an oversize
+                # one fails, rather than every request batched alongside it
+                await asyncio.gather(*(self._send([item]) for item in items))
+                return
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(items, results):
+            if future.done():
+                # The caller gave up waiting (e.g. client disconnected)
+                continue
+            if result.code == grpc.StatusCode.OK.value[0]:
+                future.set_result(result.output_data)
+            else:
+                future.set_exception(_result_error(result))
+
+
+BATCHER = RequestBatcher(POOL, BATCH_WINDOW_MS / 1000, BATCH_MAX_SIZE)
+
+# The model is deterministic, so identical inputs can be answered from memory
+# without a round trip to the model service.
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+_PRED_CACHE = TTLCache(maxsize=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL)
+
+# Optional Redis cache shared by every worker and replica, consulted when the
+# in-process cache misses. Inputs the model rejected are cached too, briefly,
+# so retry storms of bad input do not reach the model service.
+REDIS_URL = os.getenv("REDIS_URL")
+PREDICTION_NEGATIVE_CACHE_TTL = float(os.getenv("PREDICTION_NEGATIVE_CACHE_TTL", "10"))
+# Seconds to wait on Redis before treating it as down. Older redis-py
+# releases wait forever by default, which would stall every cache miss.
+REDIS_TIMEOUT = float(os.getenv("REDIS_TIMEOUT", "0.1"))
+REDIS = None
+_PRED_KEY = "pred:"
+_INVALID_KEY = "pred-invalid:"
+
+
+async def shared_cache_get_many(inputs):
+    """Return ``(output_data, invalid_details)`` cached in Redis per input.
+
+    All lookups go to Redis in a single MGET round trip.
+    """
+    if REDIS is None or not inputs:
+        return [(None, None)] * len(inputs)
+    keys = []
+    for input_data in inputs:
+        keys += (_PRED_KEY + input_data, _INVALID_KEY + input_data)
+    try:
+        values = await REDIS.mget(*keys)
+    except redis.RedisError as e:
+        logger.warning("Redis lookup failed: %s", e)
+        return [(None, None)] * len(inputs)
+    return list(zip(values[::2], values[1::2]))
+
+
+async def shared_cache_get(input_data):
+    """Return ``(output_data, invalid_details)`` cached in Redis for an input."""
+    (entry,) = await shared_cache_get_many([input_data])
+    return entry
+
+
+async def shared_cache_set(key, value, ttl):
+    """Store ``value`` in Redis for ``ttl`` seconds, ignoring Redis outages."""
+    if REDIS is None:
+        return
+    try:
+        await REDIS.set(key, value, px=int(ttl * 1000))
+    except redis.RedisError as e:
+        logger.warning("Redis store failed: %s", e)
+
+
+# Start the request batcher, the background task that closes idle cached gRPC
+# channels and, if configured, the Redis client. Channels themselves are
+# opened lazily by channel_cache.get_stub.
+@app.on_event("startup")
+async def start_channel_cache():
+    global REDIS
+    channel_cache.start_reaper()
+    BATCHER.start()
+    if REDIS_URL:
+        REDIS = redis.asyncio.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            socket_timeout=REDIS_TIMEOUT,
+            socket_connect_timeout=REDIS_TIMEOUT,
+        )
+        # Log only the location; REDIS_URL may embed a password
+        pool_kwargs = REDIS.connection_pool.connection_kwargs
+        logger.info(
+            "Shared prediction cache enabled (host=%s, db=%s)",
+            pool_kwargs.get("host", pool_kwargs.get("path")),
+            pool_kwargs.get("db"),
+        )
+
+
+@app.on_event("shutdown")
+async def close_channel_cache():
+    global REDIS
+    await BATCHER.stop()
+    await channel_cache.close_all()
+    logger.info("Closed gRPC channels to model service")
+    if REDIS is not None:
+        await REDIS.aclose()
+        REDIS = None
+
+
+def grpc_http_exception(e):
+    """Map a failed model-service call to the HTTP error returned to clients."""
+    if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
+        return HTTPException(status_code=400, detail=f"Invalid input: {e.details()}")
+    elif e.code() == grpc.StatusCode.UNAVAILABLE:
+        return HTTPException(status_code=503, detail="Model service unavailable.")
+    else:
+        return HTTPException(status_code=500, detail=f"gRPC error: {e.details()}")
+
+
+# Pydantic model for request body.
+# /predict parses its one-field body by hand, so this only documents it.
 class PredictRequestData(BaseModel):
     input_data: str
 
@@ -42,42 +375,222 @@ class PredictResponseData(BaseModel):
     output_data: str
 
 
-@app.post("/predict", response_model=PredictResponseData)
-async def predict(request_data: PredictRequestData):
-    logger.info(f"Received /predict request: {request_data.input_data}")
+async def parse_input_data(request: Request) -> str:
+    """Pull ``input_data`` out of the raw JSON body, skipping model validation."""
     try:
-        # Establish insecure gRPC channel to the model service
-        # In production, use secure channels (grpc.secure_channel)
-        async with grpc.aio.insecure_channel(MODEL_SERVICE_URL) as channel:
-            stub = anops_pb2_grpc.AnOpsStub(channel)
-            logger.info(f"Sending request to model service at {MODEL_SERVICE_URL}")
+        input_data = orjson.loads(await request.body())["input_data"]
+    except (KeyError, TypeError, ValueError):
+        input_data = None
+    if not isinstance(input_data, str):
+        raise HTTPException(
+            status_code=422,
+            detail="Body must be a JSON object with a string 'input_data' field.",
+        )
+    return input_data
 
-            # Create the gRPC request message
-            grpc_request = anops_pb2.PredictRequest(input_data=request_data.input_data)
 
-            # Make the asynchronous gRPC call
-            grpc_response = await stub.Predict(grpc_request)
+@app.post(
+    "/predict",
+    response_model=PredictResponseData,
+    response_class=ORJSONResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": PredictRequestData.model_json_schema()}
+            },
+        }
+    },
+)
+async def predict(request: Request):
+    input_data = await parse_input_data(request)
+    logger.debug("Received /predict request: %s", input_data)
+    if encoded_size(input_data) > GRPC_MAX_MESSAGE_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Input too large: at most {GRPC_MAX_MESSAGE_BYTES} bytes.",
+        )
+    cached = _PRED_CACHE.get(input_data)
+    if cached is not None:
+        return ORJSONResponse({"output_data": cached})
+    cached, invalid_details = await shared_cache_get(input_data)
+    if cached is not None:
+        _PRED_CACHE[input_data] = cached
+        return ORJSONResponse({"output_data": cached})
+    if invalid_details is not None:
+        raise HTTPException(status_code=400, detail=f"Invalid input: {invalid_details}")
+    try:
+        # Queue the input for the next batched gRPC call on the channel pool
+        output_data = await BATCHER.submit(input_data)
 
-            logger.info(
-                f"Received response from model service: {grpc_response.output_data}"
-            )
+        logger.debug("Received response from model service: %s", output_data)
 
-            # Return the response data
-            return PredictResponseData(output_data=grpc_response.output_data)
+        _PRED_CACHE[input_data] = output_data
+        await shared_cache_set(
+            _PRED_KEY + input_data, output_data, PREDICTION_CACHE_TTL
+        )
+
+        # Return the response data
+        return ORJSONResponse({"output_data": output_data})
 
     except grpc.aio.AioRpcError as e:
-        logger.error(f"gRPC error: {e}", exc_info=True)
+        logger.error("gRPC error: %s", e, exc_info=True)
         if e.code() == grpc.StatusCode.INVALID_ARGUMENT:
-            raise HTTPException(status_code=400, detail=f"Invalid input: {e.details()}")
-        elif e.code() == grpc.StatusCode.UNAVAILABLE:
-            raise HTTPException(status_code=503, detail="Model service unavailable.")
-        else:
-            raise HTTPException(status_code=500, detail=f"gRPC error: {e.details()}")
+            await shared_cache_set(
+                _INVALID_KEY + input_data,
+                e.details() or "",
+                PREDICTION_NEGATIVE_CACHE_TTL,
+            )
+        raise grpc_http_exception(e)
     except Exception as e:
-        logger.error(f"Unexpected error: {e}", exc_info=True)
+        logger.error("Unexpected error: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+# Upper bound on inputs per /predict_batch request. Misses are forwarded in
+# chunks of at most BATCH_MAX_SIZE inputs and BATCH_MAX_BYTES encoded bytes,
+# each its own PredictRequests message, so only an input that is itself over
+# GRPC_MAX_MESSAGE_BYTES could exceed the model service's receive limit, and
+# those are rejected up front.
+PREDICT_BATCH_MAX_INPUTS = int(os.getenv("PREDICT_BATCH_MAX_INPUTS", "1000"))
+
+
+# Pydantic models for the batch endpoint
+class PredictBatchRequestData(BaseModel):
+    inputs: list[str]
+
+
+class PredictBatchResponseData(BaseModel):
+    outputs: list[str]
+
+
+def chunk_inputs(inputs, max_size, max_bytes):
+    """Split ``inputs`` into batches bounded by ``max_size`` and ``max_bytes``.
+
+    An input larger than ``max_bytes`` is sent in a batch of its own.
+    """
+    chunk, size = [], 0
+    for input_data in inputs:
+        input_size = encoded_size(input_data)
+        if chunk and (len(chunk) == max_size or size + input_size > max_bytes):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(input_data)
+        size += input_size
+    if chunk:
+        yield chunk
+
+
+async def predict_uncached(inputs):
+    """Predict distinct ``inputs`` via the model service and cache the outputs.
+
+    Inputs are sent in chunks bounded by BATCH_MAX_SIZE and BATCH_MAX_BYTES,
+    concurrently over the channel pool. Raises the AioRpcError of the first
+    input the model rejected.
+    """
+
+    async def send(chunk):
+        return await predict_many(await POOL.next(), chunk)
+
+    chunks = chunk_inputs(inputs, BATCH_MAX_SIZE, BATCH_MAX_BYTES)
+    chunk_results = await asyncio.gather(*(send(chunk) for chunk in chunks))
+
+    outputs = {}
+    writes = []
+    first_error = None
+    for input_data, result in zip(
+        inputs, (result for results in chunk_results for result in results)
+    ):
+        if result.code == grpc.StatusCode.OK.value[0]:
+            outputs[input_data] = _PRED_CACHE[input_data] = result.output_data
+            writes.append(
+                shared_cache_set(
+                    _PRED_KEY + input_data, result.output_data, PREDICTION_CACHE_TTL
+                )
+            )
+            continue
+        if result.code == grpc.StatusCode.INVALID_ARGUMENT.value[0]:
+            writes.append(
+                shared_cache_set(
+                    _INVALID_KEY + input_data,
+                    result.details,
+                    PREDICTION_NEGATIVE_CACHE_TTL,
+                )
+            )
+        if first_error is None:
+            first_error = _result_error(result)
+    await asyncio.gather(*writes)
+    if first_error is not None:
+        raise first_error
+    return outputs
+
+
+@app.post(
+    "/predict_batch",
+    response_model=PredictBatchResponseData,
+    response_class=ORJSONResponse,
+)
+async def predict_batch(request_data: PredictBatchRequestData):
+    """Predict many inputs, forwarding only cache misses to the model service.
+
+    Inputs are answered from the in-process cache, then Redis, and the rest
+    go to the model service as batched calls. Outputs are returned in input
+    order. If any input fails, the whole request fails with the error of the
+    first failing input.
+    """
+    inputs = request_data.inputs
+    logger.debug("Received /predict_batch request of %d inputs", len(inputs))
+    if len(inputs) > PREDICT_BATCH_MAX_INPUTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {PREDICT_BATCH_MAX_INPUTS} inputs per request.",
+        )
+    if any(encoded_size(x) > GRPC_MAX_MESSAGE_BYTES for x in inputs):
+        raise HTTPException(
+            status_code=413,
+            detail=f"Input too large: at most {GRPC_MAX_MESSAGE_BYTES} bytes.",
+        )
+
+    found = {}
+    for input_data in inputs:
+        cached = _PRED_CACHE.get(input_data)
+        if cached is not None:
+            found[input_data] = cached
+    # Duplicate inputs are looked up and predicted once
+    misses = [x for x in dict.fromkeys(inputs) if x not in found]
+
+    remaining = []
+    for input_data, (cached, invalid_details) in zip(
+        misses, await shared_cache_get_many(misses)
+    ):
+        if cached is not None:
+            found[input_data] = _PRED_CACHE[input_data] = cached
+        elif invalid_details is not None:
+            raise HTTPException(
+                status_code=400, detail=f"Invalid input: {invalid_details}"
+            )
+        else:
+            remaining.append(input_data)
+
+    if remaining:
+        try:
+            found.update(await predict_uncached(remaining))
+        except grpc.aio.AioRpcError as e:
+            logger.error("gRPC error: %s", e, exc_info=True)
+            if e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED:
+                # Every chunk holds only this client's inputs, unlike /predict
+                raise HTTPException(
+                    status_code=413, detail=f"Request too large: {e.details()}"
+                )
+            raise grpc_http_exception(e)
+        except Exception as e:
+            logger.error("Unexpected error: %s", e, exc_info=True)
+            raise HTTPException(
+                status_code=500, detail=f"Internal server error: {str(e)}"
+            )
+    return ORJSONResponse({"outputs": [found[x] for x in inputs]})
+
+
 @app.get("/health")
 async def health_check():
     # Basic health check endpoint
@@ -89,4 +602,14 @@ if __name__ == "__main__":
     # Uvicorn will run the app in the Docker container.
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # One worker process per CPU sidesteps the GIL; each worker opens its own
+    # channel pool. uvloop and httptools replace the pure-Python event loop
+    # and HTTP parser. Workers need the app as an import string.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 2)),
+        loop="uvloop",
+        http="httptools",
+    )
@@ -0,0 +1,66 @@
+import asyncio
+
+import channel_cache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_get_stub_reuses_channel_for_same_key():
+    async def scenario():
+        first = await channel_cache.get_stub("localhost:1")
+        second = await channel_cache.get_stub("localhost:1")
+        assert first is second
+        assert len(channel_cache._CHANNELS) == 1
+        await channel_cache.close_all()
+
+    run(scenario())
+
+
+def test_get_stub_keys_on_options_and_target():
+    async def scenario():
+        base = await channel_cache.get_stub("localhost:1")
+        other_target = await channel_cache.get_stub("localhost:2")
+        with_options = await channel_cache.get_stub(
+            "localhost:1", options=[("grpc.channel_id", 1)]
+        )
+        assert len({id(base), id(other_target), id(with_options)}) == 3
+        assert len(channel_cache._CHANNELS) == 3
+        await channel_cache.close_all()
+
+    run(scenario())
+
+
+def test_evict_idle_closes_only_expired_channels():
+    async def scenario():
+        await channel_cache.get_stub("localhost:1")
+        await channel_cache.get_stub("localhost:2")
+        # Age one entry past the idle timeout
+        key = channel_cache._make_key("localhost:1", None, None)
+        channel, stub, last_used = channel_cache._CHANNELS[key]
+        channel_cache._CHANNELS[key] = (channel, stub, last_used - 100)
+
+        evicted = await channel_cache.evict_idle(max_idle=50)
+        assert evicted == 1
+        assert key not in channel_cache._CHANNELS
+        assert len(channel_cache._CHANNELS) == 1
+
+        # An evicted target is transparently re-opened on next use
+        assert await channel_cache.get_stub("localhost:1") is not stub
+        await channel_cache.close_all()
+
+    run(scenario())
+
+
+def test_close_all_stops_reaper():
+    async def scenario():
+        task = channel_cache.start_reaper(interval=60)
+        assert channel_cache.start_reaper() is task
+        await channel_cache.get_stub("localhost:1")
+        await channel_cache.close_all()
+        assert task.cancelled()
+        assert channel_cache._reaper_task is None
+        assert channel_cache._CHANNELS == {}
+
+    run(scenario())
@@ -1,90 +1,403 @@
+import os
+import sys
+import time
+import socket
+import logging
+import asyncio
+import subprocess
 import pytest
+import grpc._cython.cygrpc
 from fastapi.testclient import TestClient
 import main
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, AsyncMock, MagicMock
 
 client = TestClient(main.app)
 
 
+async def fake_predict_batch(batch):
+    """Stands in for the PredictBatch RPC, upper-casing each input it is sent."""
+    results = []
+    for request in batch.requests:
+        if request.input_data:
+            results.append(
+                main.anops_pb2.PredictResult(output_data=request.input_data.upper())
+            )
+        else:
+            results.append(
+                main.anops_pb2.PredictResult(
+                    code=main.grpc.StatusCode.INVALID_ARGUMENT.value[0],
+                    details="Invalid input: empty",
+                )
+            )
+    return main.anops_pb2.PredictResponses(results=results)
+
+
+def fake_pool(predict_batch=fake_predict_batch):
+    stub = MagicMock()
+    stub.PredictBatch.side_effect = predict_batch
+    pool = MagicMock()
+    pool.next = AsyncMock(return_value=stub)
+    return pool, stub
+
+
+@pytest.fixture
+def model_stub(monkeypatch):
+    """Point main.POOL at a fake model service and return its stub."""
+    pool, stub = fake_pool()
+    monkeypatch.setattr(main, "POOL", pool)
+    return stub
+
+
+@pytest.fixture(autouse=True)
+def clear_prediction_cache():
+    main._PRED_CACHE.clear()
+    yield
+    main._PRED_CACHE.clear()
+
+
+def test_check_protobuf_backend(monkeypatch):
+    # protobuf only warns when it falls back, so the service must refuse to run
+    monkeypatch.setenv("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION", "upb")
+    monkeypatch.setattr(main.api_implementation, "Type", lambda: "upb")
+    main.check_protobuf_backend()
+
+    monkeypatch.setattr(main.api_implementation, "Type", lambda: "python")
+    with pytest.raises(RuntimeError, match="python backend, not the requested upb"):
+        main.check_protobuf_backend()
+
+    # Nothing requested, nothing to enforce
+    monkeypatch.delenv("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION")
+    main.check_protobuf_backend()
+
+
 def test_health_check():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
 
 
-@pytest.mark.asyncio
-@patch("main.anops_pb2_grpc.AnOpsStub")
-async def test_predict_success(mock_stub):
-    # Mock the gRPC stub's Predict method
-    mock_predict = AsyncMock()
-    mock_predict.return_value = main.anops_pb2.PredictResponse(
-        output_data="MOCKED OUTPUT"
-    )
-    mock_stub.return_value.Predict = mock_predict
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_responds_with_orjson(mock_submit):
+    mock_submit.return_value = "caf\u00e9"
+    response = client.post("/predict", json={"input_data": "test"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    # orjson emits compact UTF-8 rather than ASCII escapes
+    assert response.content == '{"output_data":"caf\u00e9"}'.encode()
 
-    response = await client.post("/predict", json={"input_data": "test input"})
+
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_success(mock_submit):
+    # Mock the batched call to the model service
+    mock_submit.return_value = "MOCKED OUTPUT"
+
+    response = client.post("/predict", json={"input_data": "test input"})
     assert response.status_code == 200
     assert response.json() == {"output_data": "MOCKED OUTPUT"}
-    mock_predict.assert_awaited_once()
+    mock_submit.assert_awaited_once_with("test input")
+
 
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_serves_repeat_inputs_from_cache(mock_submit):
+    mock_submit.return_value = "OUT"
+
+    for _ in range(3):
+        response = client.post("/predict", json={"input_data": "repeat"})
+        assert response.status_code == 200
+        assert response.json() == {"output_data": "OUT"}
+    mock_submit.assert_awaited_once()
+
+    # A different input still goes to the model service
+    client.post("/predict", json={"input_data": "other"})
+    assert mock_submit.await_count == 2
+
+
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_errors_are_not_cached(mock_submit):
+    mock_submit.side_effect = main.grpc.aio.AioRpcError(
+        main.grpc.StatusCode.UNAVAILABLE, "Service down"
+    )
 
-@pytest.mark.asyncio
-@patch("main.anops_pb2_grpc.AnOpsStub")
-async def test_predict_invalid_argument(mock_stub):
+    for _ in range(2):
+        response = client.post("/predict", json={"input_data": "flaky"})
+        assert response.status_code == 503
+    assert mock_submit.await_count == 2
+    assert "flaky" not in main._PRED_CACHE
+
+
+@patch("channel_cache.anops_pb2_grpc.AnOpsStub")
+def test_channels_pooled_across_requests(mock_stub_cls):
+    # Requests round-robin over a fixed set of cached channels,
+    # all of which are closed on shutdown
+    mock_stub_cls.return_value.PredictBatch.side_effect = fake_predict_batch
+
+    with TestClient(main.app) as lifespan_client:
+        for i in range(2 * len(main.POOL)):
+            response = lifespan_client.post("/predict", json={"input_data": f"x{i}"})
+            assert response.status_code == 200
+            assert response.json() == {"output_data": f"X{i}"}
+        assert len(main.channel_cache._CHANNELS) == len(main.POOL)
+
+    assert mock_stub_cls.call_count == len(main.POOL)
+    assert mock_stub_cls.return_value.PredictBatch.call_count == 2 * len(main.POOL)
+    assert main.channel_cache._CHANNELS == {}
+
+
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_rejects_oversize_input(mock_submit, monkeypatch):
+    monkeypatch.setattr(main, "GRPC_MAX_MESSAGE_BYTES", 50)
+
+    response = client.post("/predict", json={"input_data": "x" * 100})
+    assert response.status_code == 413
+    assert "too large" in response.json()["detail"]
+    mock_submit.assert_not_awaited()
+
+
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_invalid_argument(mock_submit):
     # Simulate gRPC INVALID_ARGUMENT error
-    mock_predict = AsyncMock()
     error = main.grpc.aio.AioRpcError(
         main.grpc.StatusCode.INVALID_ARGUMENT, "Invalid input!"
     )
-    mock_predict.side_effect = error
-    mock_stub.return_value.Predict = mock_predict
+    mock_submit.side_effect = error
 
-    response = await client.post("/predict", json={"input_data": ""})
+    response = client.post("/predict", json={"input_data": ""})
     assert response.status_code == 400
     assert "Invalid input" in response.json()["detail"]
 
 
-@pytest.mark.asyncio
-@patch("main.anops_pb2_grpc.AnOpsStub")
-async def test_predict_service_unavailable(mock_stub):
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_service_unavailable(mock_submit):
     # Simulate gRPC UNAVAILABLE error
-    mock_predict = AsyncMock()
     error = main.grpc.aio.AioRpcError(main.grpc.StatusCode.UNAVAILABLE, "Service down")
-    mock_predict.side_effect = error
-    mock_stub.return_value.Predict = mock_predict
+    mock_submit.side_effect = error
 
-    response = await client.post("/predict", json={"input_data": "test"})
+    response = client.post("/predict", json={"input_data": "test"})
     assert response.status_code == 503
     assert "unavailable" in response.json()["detail"].lower()
 
 
-@pytest.mark.asyncio
-@patch("main.anops_pb2_grpc.AnOpsStub")
-async def test_predict_internal_error(mock_stub):
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_internal_error(mock_submit):
     # Simulate generic gRPC error
-    mock_predict = AsyncMock()
     error = main.grpc.aio.AioRpcError(main.grpc.StatusCode.INTERNAL, "Internal error")
-    mock_predict.side_effect = error
-    mock_stub.return_value.Predict = mock_predict
+    mock_submit.side_effect = error
 
-    response = await client.post("/predict", json={"input_data": "test"})
+    response = client.post("/predict", json={"input_data": "test"})
     assert response.status_code == 500
     assert "gRPC error" in response.json()["detail"]
 
 
-@pytest.mark.asyncio
-@patch("main.anops_pb2_grpc.AnOpsStub")
-async def test_predict_unexpected_exception(mock_stub):
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_resource_exhausted_is_not_blamed_on_client(mock_submit):
+    # The oversize payload may have been another request's, so no 413
+    mock_submit.side_effect = main.grpc.aio.AioRpcError(
+        main.grpc.StatusCode.RESOURCE_EXHAUSTED,
+        main.grpc.aio.Metadata(),
+        main.grpc.aio.Metadata(),
+        details="Received message larger than max",
+    )
+
+    response = client.post("/predict", json={"input_data": "test"})
+    assert response.status_code == 500
+
+
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_unexpected_exception(mock_submit):
     # Simulate unexpected exception
-    mock_predict = AsyncMock()
-    mock_predict.side_effect = Exception("Unexpected!")
-    mock_stub.return_value.Predict = mock_predict
+    mock_submit.side_effect = Exception("Unexpected!")
 
-    response = await client.post("/predict", json={"input_data": "test"})
+    response = client.post("/predict", json={"input_data": "test"})
     assert response.status_code == 500
     assert "Internal server error" in response.json()["detail"]
 
 
+@patch("main.channel_cache.get_stub", new_callable=AsyncMock)
+def test_channel_pool_round_robin(mock_get_stub):
+    pool = main.ChannelPool("mockhost:1", 3, main.GRPC_CHANNEL_OPTIONS)
+
+    async def take(n):
+        for _ in range(n):
+            await pool.next()
+
+    asyncio.run(take(4))
+    channel_ids = [
+        call.kwargs["options"][0][1] for call in mock_get_stub.await_args_list
+    ]
+    assert channel_ids == [0, 1, 2, 0]
+    for call in mock_get_stub.await_args_list:
+        assert call.kwargs["options"][1:] == main.GRPC_CHANNEL_OPTIONS
+    assert {call.args[0] for call in mock_get_stub.await_args_list} == {"mockhost:1"}
+
+
+def test_batcher_coalesces_concurrent_requests():
+    pool, stub = fake_pool()
+    batcher = main.RequestBatcher(pool, window=0.01, max_size=10)
+
+    async def scenario():
+        batcher.start()
+        outputs = await asyncio.gather(*[batcher.submit(f"in{i}") for i in range(5)])
+        await batcher.stop()
+        return outputs
+
+    assert asyncio.run(scenario()) == [f"IN{i}" for i in range(5)]
+    # All five inputs travelled in a single PredictRequests message
+    stub.PredictBatch.assert_called_once()
+    pool.next.assert_awaited_once()
+
+
+def test_predict_many_sends_one_message_per_batch():
+    stub = MagicMock()
+    stub.PredictBatch.side_effect = fake_predict_batch
+
+    results = asyncio.run(main.predict_many(stub, ["a", "b", "c"]))
+    assert [r.output_data for r in results] == ["A", "B", "C"]
+    (batch,) = stub.PredictBatch.call_args.args
+    assert [r.input_data for r in batch.requests] == ["a", "b", "c"]
+
+
+def test_predict_many_rejects_incomplete_batch():
+    stub = MagicMock()
+    stub.PredictBatch = AsyncMock(return_value=main.anops_pb2.PredictResponses())
+
+    with pytest.raises(RuntimeError, match="incomplete batch"):
+        asyncio.run(main.predict_many(stub, ["a"]))
+
+
+def test_batcher_respects_max_size():
+    pool, stub = fake_pool()
+    batcher = main.RequestBatcher(pool, window=0.01, max_size=2)
+
+    async def scenario():
+        batcher.start()
+        outputs = await asyncio.gather(*[batcher.submit(f"in{i}") for i in range(5)])
+        await batcher.stop()
+        return outputs
+
+    assert asyncio.run(scenario()) == [f"IN{i}" for i in range(5)]
+    assert stub.PredictBatch.call_count == 3
+
+
+def test_batcher_flushes_by_encoded_size():
+    pool, stub = fake_pool()
+    # Each four-character input encodes to at most 16 bytes, so two fit
+    batcher = main.RequestBatcher(pool, window=0.01, max_size=10, max_bytes=40)
+
+    async def scenario():
+        batcher.start()
+        outputs = await asyncio.gather(*[batcher.submit(f"in{i}_") for i in range(5)])
+        await batcher.stop()
+        return outputs
+
+    assert asyncio.run(scenario()) == [f"IN{i}_" for i in range(5)]
+    assert stub.PredictBatch.call_count == 3
+
+
+def test_batcher_sends_oversize_input_alone():
+    pool, stub = fake_pool()
+    batcher = main.RequestBatcher(pool, window=0.01, max_size=10, max_bytes=40)
+    big = "x" * 100
+
+    async def scenario():
+        batcher.start()
+        outputs = await asyncio.gather(
+            batcher.submit("a"), batcher.submit(big), batcher.submit("b")
+        )
+        await batcher.stop()
+        return outputs
+
+    assert asyncio.run(scenario()) == ["A", big.upper(), "B"]
+    batches = [
+        [r.input_data for r in call.args[0].requests]
+        for call in stub.PredictBatch.call_args_list
+    ]
+    assert batches == [["a"], [big], ["b"]]
+
+
+def test_batcher_retries_members_of_oversize_batch():
+    async def size_limited(batch):
+        # Mimics the model service's receive limit on the whole message
+        if batch.ByteSize() > 50:
+            raise main.grpc.aio.AioRpcError(
+                main.grpc.StatusCode.RESOURCE_EXHAUSTED,
+                main.grpc.aio.Metadata(),
+                main.grpc.aio.Metadata(),
+                details="Received message larger than max",
+            )
+        return await fake_predict_batch(batch)
+
+    pool, _ = fake_pool(size_limited)
+    batcher = main.RequestBatcher(pool, window=0.01, max_size=10, max_bytes=1000)
+
+    async def scenario():
+        batcher.start()
+        outputs = await asyncio.gather(
+            batcher.submit("small"),
+            batcher.submit("x" * 100),
+            return_exceptions=True,
+        )
+        await batcher.stop()
+        return outputs
+
+    small, big = asyncio.run(scenario())
+    assert small == "SMALL"
+    assert big.code() == main.grpc.StatusCode.RESOURCE_EXHAUSTED
+
+
+def test_batcher_reports_item_errors_individually():
+    pool, _ = fake_pool()
+    batcher = main.RequestBatcher(pool, window=0.01, max_size=10)
+
+    async def scenario():
+        batcher.start()
+        outputs = await asyncio.gather(
+            batcher.submit("ok"), batcher.submit(""), return_exceptions=True
+        )
+        await batcher.stop()
+        return outputs
+
+    ok, failed = asyncio.run(scenario())
+    assert ok == "OK"
+    assert isinstance(failed, main.grpc.aio.AioRpcError)
+    assert failed.code() == main.grpc.StatusCode.INVALID_ARGUMENT
+    assert failed.details() == "Invalid input: empty"
+
+
+def test_batcher_fails_whole_batch_on_rpc_error():
+    error = main.grpc.aio.AioRpcError(
+        main.grpc.StatusCode.UNAVAILABLE,
+        main.grpc.aio.Metadata(),
+        main.grpc.aio.Metadata(),
+    )
+
+    pool, _ = fake_pool(AsyncMock(side_effect=error))
+    batcher = main.RequestBatcher(pool, window=0.01, max_size=10)
+
+    async def scenario():
+        batcher.start()
+        outputs = await asyncio.gather(
+            batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+        )
+        await batcher.stop()
+        return outputs
+
+    assert asyncio.run(scenario()) == [error, error]
+
+
+def test_batcher_requires_start():
+    batcher = main.RequestBatcher(MagicMock(), window=0, max_size=1)
+    with pytest.raises(RuntimeError, match="not running"):
+        asyncio.run(batcher.submit("x"))
+
+
+def test_channel_options_are_known_to_grpc():
+    # gRPC silently ignores unknown args; the recognised keys live in cygrpc
+    with open(grpc._cython.cygrpc.__file__, "rb") as f:
+        binary = f.read()
+    for key, _ in main.GRPC_CHANNEL_OPTIONS:
+        assert key.encode() in binary, key
+
+
 def test_predict_malformed_request():
     # Missing required field 'input_data'
     response = client.post("/predict", json={})
@@ -92,8 +405,284 @@ def test_predict_malformed_request():
     assert "input_data" in response.text
 
 
+class FakeRedis:
+    """In-memory stand-in for the redis.asyncio client calls the cache makes."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, px=None):
+        self.data[key] = value
+        self.ttls[key] = px
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(main, "REDIS", fake)
+    return fake
+
+
+def test_redis_url_credentials_not_logged(monkeypatch, caplog):
+    monkeypatch.setattr(main, "REDIS_URL", "redis://:hunter2@localhost:6379/3")
+    caplog.set_level(logging.INFO, logger="main")
+
+    with TestClient(main.app):
+        assert main.REDIS is not None
+    assert main.REDIS is None
+
+    assert "Shared prediction cache enabled (host=localhost, db=3)" in caplog.text
+    assert "hunter2" not in caplog.text
+
+
+def test_redis_client_times_out_quickly(monkeypatch):
+    monkeypatch.setattr(main, "REDIS_URL", "redis://localhost:6379/0")
+
+    with TestClient(main.app):
+        pool_kwargs = main.REDIS.connection_pool.connection_kwargs
+        assert pool_kwargs["socket_timeout"] == main.REDIS_TIMEOUT
+        assert pool_kwargs["socket_connect_timeout"] == main.REDIS_TIMEOUT
+
+
+def test_predict_falls_through_when_redis_hangs(monkeypatch):
+    # A listener that never answers stands in for a blackholed Redis
+    with socket.create_server(("127.0.0.1", 0)) as silent:
+        port = silent.getsockname()[1]
+        monkeypatch.setattr(main, "REDIS_URL", f"redis://127.0.0.1:{port}/0")
+        monkeypatch.setattr(main.BATCHER, "submit", AsyncMock(return_value="OUT"))
+
+        with TestClient(main.app) as lifespan_client:
+            started = time.monotonic()
+            response = lifespan_client.post("/predict", json={"input_data": "x"})
+            elapsed = time.monotonic() - started
+    assert response.status_code == 200
+    assert response.json() == {"output_data": "OUT"}
+    # One lookup and one store, each given up after REDIS_TIMEOUT
+    assert elapsed < 10 * main.REDIS_TIMEOUT
+
+
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_reads_shared_cache(mock_submit, fake_redis):
+    fake_redis.data["pred:shared"] = "FROM REDIS"
+
+    response = client.post("/predict", json={"input_data": "shared"})
+    assert response.status_code == 200
+    assert response.json() == {"output_data": "FROM REDIS"}
+    mock_submit.assert_not_awaited()
+    # The hit is promoted into the in-process cache
+    assert main._PRED_CACHE["shared"] == "FROM REDIS"
+
+
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_writes_shared_cache(mock_submit, fake_redis):
+    mock_submit.return_value = "OUT"
+
+    response = client.post("/predict", json={"input_data": "fresh"})
+    assert response.status_code == 200
+    assert fake_redis.data["pred:fresh"] == "OUT"
+    assert fake_redis.ttls["pred:fresh"] == int(main.PREDICTION_CACHE_TTL * 1000)
+
+
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_negative_caches_invalid_input(mock_submit, fake_redis):
+    mock_submit.side_effect = main.grpc.aio.AioRpcError(
+        main.grpc.StatusCode.INVALID_ARGUMENT,
+        main.grpc.aio.Metadata(),
+        main.grpc.aio.Metadata(),
+        details="Input data cannot be empty.",
+    )
+
+    for _ in range(3):
+        response = client.post("/predict", json={"input_data": ""})
+        assert response.status_code == 400
+        assert "Input data cannot be empty." in response.json()["detail"]
+    # Only the first attempt reached the model service
+    mock_submit.assert_awaited_once()
+    assert fake_redis.ttls["pred-invalid:"] == int(
+        main.PREDICTION_NEGATIVE_CACHE_TTL * 1000
+    )
+
+
+@patch("main.BATCHER.submit", new_callable=AsyncMock)
+def test_predict_survives_redis_outage(mock_submit, monkeypatch):
+    broken = MagicMock()
+    broken.mget = AsyncMock(side_effect=main.redis.ConnectionError("down"))
+    broken.set = AsyncMock(side_effect=main.redis.ConnectionError("down"))
+    monkeypatch.setattr(main, "REDIS", broken)
+    mock_submit.return_value = "OUT"
+
+    response = client.post("/predict", json={"input_data": "test"})
+    assert response.status_code == 200
+    assert response.json() == {"output_data": "OUT"}
+    broken.set.assert_awaited_once()
+
+
+def test_predict_batch_single_rpc(model_stub):
+    response = client.post("/predict_batch", json={"inputs": ["a", "b", "c"]})
+    assert response.status_code == 200
+    assert response.json() == {"outputs": ["A", "B", "C"]}
+    # All inputs travel in one PredictBatch call
+    model_stub.PredictBatch.assert_called_once()
+    assert main._PRED_CACHE["b"] == "B"
+
+
+def test_predict_batch_empty(model_stub):
+    response = client.post("/predict_batch", json={"inputs": []})
+    assert response.status_code == 200
+    assert response.json() == {"outputs": []}
+    model_stub.PredictBatch.assert_not_called()
+
+
+def test_predict_batch_invalid_item(model_stub):
+    response = client.post("/predict_batch", json={"inputs": ["ok", ""]})
+    assert response.status_code == 400
+    assert "Invalid input" in response.json()["detail"]
+    # The valid input's output is still cached for the client's retry
+    assert main._PRED_CACHE["ok"] == "OK"
+
+
+def test_predict_batch_service_unavailable(model_stub):
+    model_stub.PredictBatch.side_effect = main.grpc.aio.AioRpcError(
+        main.grpc.StatusCode.UNAVAILABLE,
+        main.grpc.aio.Metadata(),
+        main.grpc.aio.Metadata(),
+    )
+
+    response = client.post("/predict_batch", json={"inputs": ["a"]})
+    assert response.status_code == 503
+
+
+def test_predict_batch_uses_caches(model_stub, fake_redis):
+    main._PRED_CACHE["local"] = "FROM MEMORY"
+    fake_redis.data["pred:shared"] = "FROM REDIS"
+
+    response = client.post(
+        "/predict_batch", json={"inputs": ["local", "shared", "new", "new"]}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"outputs": ["FROM MEMORY", "FROM REDIS", "NEW", "NEW"]}
+    # Only the miss went to the model service, once despite the duplicate
+    assert model_stub.PredictBatch.call_count == 1
+    assert main._PRED_CACHE["shared"] == "FROM REDIS"
+    assert fake_redis.data["pred:new"] == "NEW"
+
+    # A fully cached batch makes no model-service call at all
+    response = client.post("/predict_batch", json={"inputs": ["new", "shared"]})
+    assert response.json() == {"outputs": ["NEW", "FROM REDIS"]}
+    assert model_stub.PredictBatch.call_count == 1
+
+
+def test_predict_batch_negative_cache(model_stub, fake_redis):
+    for _ in range(2):
+        response = client.post("/predict_batch", json={"inputs": ["a", ""]})
+        assert response.status_code == 400
+    assert "pred-invalid:" in fake_redis.data
+    # The second attempt was answered from the caches
+    assert model_stub.PredictBatch.call_count == 1
+
+
+def test_predict_batch_splits_into_chunks(model_stub, monkeypatch):
+    monkeypatch.setattr(main, "BATCH_MAX_SIZE", 2)
+
+    inputs = [f"in{i}" for i in range(5)]
+    response = client.post("/predict_batch", json={"inputs": inputs})
+    assert response.status_code == 200
+    assert response.json() == {"outputs": [x.upper() for x in inputs]}
+    assert model_stub.PredictBatch.call_count == 3
+
+
+def test_predict_batch_chunks_by_encoded_size(model_stub, monkeypatch):
+    # Each input encodes to at most 16 bytes, so two fit in a chunk
+    monkeypatch.setattr(main, "BATCH_MAX_BYTES", 40)
+
+    inputs = [f"in{i}_" for i in range(5)]
+    response = client.post("/predict_batch", json={"inputs": inputs})
+    assert response.status_code == 200
+    assert response.json() == {"outputs": [x.upper() for x in inputs]}
+    assert model_stub.PredictBatch.call_count == 3
+
+
+def test_predict_batch_rejects_oversize_input(model_stub, monkeypatch):
+    monkeypatch.setattr(main, "GRPC_MAX_MESSAGE_BYTES", 50)
+
+    response = client.post("/predict_batch", json={"inputs": ["a", "x" * 100]})
+    assert response.status_code == 413
+    assert "too large" in response.json()["detail"]
+    model_stub.PredictBatch.assert_not_called()
+
+
+def test_predict_batch_rejects_oversize_request(model_stub, monkeypatch):
+    monkeypatch.setattr(main, "PREDICT_BATCH_MAX_INPUTS", 3)
+
+    response = client.post("/predict_batch", json={"inputs": ["a"] * 4})
+    assert response.status_code == 413
+    model_stub.PredictBatch.assert_not_called()
+
+
+def test_predict_batch_resource_exhausted(model_stub):
+    model_stub.PredictBatch.side_effect = main.grpc.aio.AioRpcError(
+        main.grpc.StatusCode.RESOURCE_EXHAUSTED,
+        main.grpc.aio.Metadata(),
+        main.grpc.aio.Metadata(),
+        details="Received message larger than max",
+    )
+
+    response = client.post("/predict_batch", json={"inputs": ["a"]})
+    assert response.status_code == 413
+    assert "too large" in response.json()["detail"]
+
+
+def test_predict_batch_malformed_request():
+    response = client.post("/predict_batch", json={"inputs": "not a list"})
+    assert response.status_code == 422
+
+
+def test_predict_rejects_non_json_body():
+    response = client.post(
+        "/predict", content=b"not json", headers={"content-type": "application/json"}
+    )
+    assert response.status_code == 422
+
+
+def test_predict_rejects_non_string_input():
+    for body in ({"input_data": 42}, {"input_data": None}, ["input_data"]):
+        response = client.post("/predict", json=body)
+        assert response.status_code == 422
+        assert "input_data" in response.text
+
+
+def test_predict_documents_request_body():
+    schema = client.get("/openapi.json").json()
+    body = schema["paths"]["/predict"]["post"]["requestBody"]
+    properties = body["content"]["application/json"]["schema"]["properties"]
+    assert "input_data" in properties
+
+
 def test_predict_env_var(monkeypatch):
-    # Patch the environment variable and reload the app
+    # MODEL_SERVICE_URL is read at import, so check it in a fresh interpreter
     monkeypatch.setenv("MODEL_SERVICE_URL", "mockhost:12345")
-    # The app should pick up the env var (this is a basic check, deeper checks require more refactoring)
-    assert main.MODEL_SERVICE_URL == "mockhost:12345"
+    result = subprocess.run(
+        [sys.executable, "-c", "import main; print(main.MODEL_SERVICE_TARGET)"],
+        cwd=os.path.dirname(os.path.abspath(main.__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "dns:///mockhost:12345"
+
+
+def test_grpc_target():
+    assert main.grpc_target("model-service:50051") == "dns:///model-service:50051"
+    assert main.grpc_target("localhost:50051") == "dns:///localhost:50051"
+    for target in (
+        "dns:///model-service:50051",
+        "ipv4:10.0.0.1:50051",
+        "ipv6:[::1]:50051",
+        "unix:///var/run/anops.sock",
+    ):
+        assert main.grpc_target(target) == target
+    assert main.POOL.target == main.MODEL_SERVICE_TARGET
@@ -1,6 +1,7 @@
 import grpc
-from concurrent import futures
-import time
+import asyncio
+from functools import lru_cache
+from google.protobuf.internal import api_implementation
 import logging
 import os  # Added os
 from pythonjsonlogger import jsonlogger
@@ -11,7 +12,10 @@ log_file = "/app/logs/model-service.log"
 logHandler = logging.FileHandler(log_file)
 formatter = jsonlogger.JsonFormatter()
 logHandler.setFormatter(formatter)
-logging.basicConfig(level=logging.INFO, handlers=[logHandler], format=None)
+# Set LOG_LEVEL=DEBUG to trace individual requests
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(), handlers=[logHandler], format=None
+)
 logger = logging.getLogger(__name__)
 
 # Import the generated classes
@@ -19,6 +23,23 @@ import anops_pb2
 import anops_pb2_grpc
 
 
+def check_protobuf_backend():
+    """Raise if protobuf is not using the backend the environment asked for.
+
+    With PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=upb but no C extension,
+    protobuf only warns and falls back to its pure-Python implementation.
+    """
+    requested = os.getenv("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION")
+    actual = api_implementation.Type()
+    if requested and actual != requested:
+        raise RuntimeError(
+            f"protobuf is using its {actual} backend, not the requested {requested}"
+        )
+
+
+check_protobuf_backend()
+
+
 # --- Simple Model Logic --- #
 def load_model_resource():
     """Placeholder for loading any model artifacts (files, connections, etc.)."""
@@ -30,16 +51,27 @@ def load_model_resource():
 
 # Load resource once when the server starts (or lazily on first request)
 MODEL_PREFIX = load_model_resource()
+# Prefix and separator joined once, so each call is a single concatenation
+_PREFIX_SPACE = MODEL_PREFIX + " "
+
+# Number of distinct inputs whose outputs are kept in memory
+MODEL_CACHE_SIZE = int(os.getenv("MODEL_CACHE_SIZE", "50000"))
+
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def _cached_transform(input_str: str) -> str:
+    """Pure model transform, memoised since the output depends only on input."""
+    # Example: Add a prefix and convert to uppercase
+    return _PREFIX_SPACE + input_str.upper()
 
 
 def run_model(input_str: str) -> str:
     """Placeholder for actual model execution."""
-    logger.info(f"Running model with input: '{input_str}'")
+    logger.debug("Running model with input: '%s'", input_str)
     if not input_str:
         raise ValueError("Input data cannot be empty.")
-    # Example: Add a prefix and convert to uppercase
-    output_str = f"{MODEL_PREFIX} {input_str.upper()}"
-    logger.info(f"Model output: '{output_str}'")
+    output_str = _cached_transform(input_str)
+    logger.debug("Model output: '%s'", output_str)
     return output_str
 
 
@@ -50,50 +82,109 @@ def run_model(input_str: str) -> str:
 class AnOpsServicer(anops_pb2_grpc.AnOpsServicer):
     """Provides methods that implement functionality of the AnOps server."""
 
-    def Predict(self, request, context):
+    async def Predict(self, request, context):
         """Handles the Predict RPC call."""
-        logger.info(f"Received Predict request with data: '{request.input_data}'")
+        logger.debug("Received Predict request with data: '%s'", request.input_data)
         # --- Call the model logic --- #
         try:
             output = run_model(request.input_data)
             return anops_pb2.PredictResponse(output_data=output)
         except ValueError as ve:
-            logger.warning(f"Invalid input data: {ve}")
+            logger.warning("Invalid input data: %s", ve)
             context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
             context.set_details(f"Invalid input: {ve}")
             return anops_pb2.PredictResponse()  # Return empty response on error
         except Exception as e:
-            logger.error(f"Model execution failed: {e}", exc_info=True)  # Log traceback
+            # Log traceback
+            logger.error("Model execution failed: %s", e, exc_info=True)
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(f"Internal model execution error: {e}")
             return anops_pb2.PredictResponse()  # Return empty response on error
         # -------------------------- #
 
+    async def PredictBatch(self, request, context):
+        """Handles the PredictBatch RPC, answering a batch with one message.
+
+        Failures are reported per item in PredictResult.code/details so one
+        bad input does not fail the rest of its batch.
+        """
+        logger.debug("Received PredictBatch of %d", len(request.requests))
+        responses = anops_pb2.PredictResponses()
+        for item in request.requests:
+            result = responses.results.add()
+            try:
+                result.output_data = run_model(item.input_data)
+            except ValueError as ve:
+                logger.warning("Invalid input data: %s", ve)
+                result.code = grpc.StatusCode.INVALID_ARGUMENT.value[0]
+                result.details = f"Invalid input: {ve}"
+            except Exception as e:
+                logger.error("Model execution failed: %s", e, exc_info=True)
+                result.code = grpc.StatusCode.INTERNAL.value[0]
+                result.details = f"Internal model execution error: {e}"
+        return responses
+
+
+# Server-side HTTP/2 tuning. The defaults (100 concurrent streams per
+# connection, small write buffer) throttle throughput under load.
+SERVER_OPTIONS = [
+    ("grpc.max_concurrent_streams", 1000),
+    ("grpc.keepalive_time_ms", 20000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    # Accept the api-service's 20 s keepalive pings on idle connections
+    # instead of answering GOAWAY "too_many_pings" (default minimum is 5 min)
+    ("grpc.http2.min_ping_interval_without_data_ms", 10000),
+    ("grpc.http2.max_pings_without_data", 0),
+    ("grpc.so_reuseport", 1),
+    ("grpc.http2.write_buffer_size", 1 << 20),
+]
+
+# Comma-separated addresses to listen on. A unix: address such as
+# unix:///var/run/anops/anops.sock lets a co-located api-service skip the
+# TCP/IP stack entirely.
+MODEL_LISTEN = os.getenv("MODEL_LISTEN", "[::]:50051")
+
+
+def listen_addresses(spec: str) -> list:
+    """Split a MODEL_LISTEN value into the addresses to bind."""
+    addresses = [address.strip() for address in spec.split(",") if address.strip()]
+    if not addresses:
+        # Otherwise the server would start listening on nothing
+        raise ValueError(f"MODEL_LISTEN names no address to listen on: {spec!r}")
+    return addresses
+
 
 # Function to start the server
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+async def serve():
+    # The asyncio server serves every call on one event loop rather than a
+    # fixed-size thread pool, so concurrency is not capped by worker count.
+    server = grpc.aio.server(options=SERVER_OPTIONS)
     anops_pb2_grpc.add_AnOpsServicer_to_server(AnOpsServicer(), server)
 
-    port = "[::]:50051"  # Listen on all interfaces, port 50051
-    server.add_insecure_port(port)
+    # TCP (e.g. [::]:50051 for all interfaces) and/or unix: socket addresses
+    addresses = listen_addresses(MODEL_LISTEN)
+    for address in addresses:
+        server.add_insecure_port(address)
 
-    logger.info(f"Starting gRPC server on {port}")
-    server.start()
+    logger.info("Starting gRPC server on %s", ", ".join(addresses))
+    await server.start()
     logger.info("Server started. Waiting for requests...")
 
-    # Keep the server running
+    # Keep the server running until cancelled (e.g. Ctrl+C)
     try:
-        while True:
-            time.sleep(86400)  # Keep alive for one day
-    except KeyboardInterrupt:
+        await server.wait_for_termination()
+    finally:
         logger.info("Stopping server...")
-        server.stop(0)  # Graceful stop with no grace period
+        await server.stop(0)  # Graceful stop with no grace period
         logger.info("Server stopped.")
 
 
 if __name__ == "__main__":
-    serve()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
 
 # TODO: Add unit tests for the model logic (run_model, load_model_resource).
 # TODO: Add integration tests for the gRPC server (AnOpsServicer.Predict).
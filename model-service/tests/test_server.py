@@ -1,7 +1,10 @@
 import pytest
 import grpc
+import grpc._cython.cygrpc
 import os
-from concurrent import futures
+import asyncio
+import contextlib
+import threading
 from unittest import mock
 
 # Import the modules to be tested
@@ -12,6 +15,21 @@ import anops_pb2_grpc
 # --- Unit Tests for Model Logic --- #
 
 
+def test_check_protobuf_backend(monkeypatch):
+    """Test that a fallback from the requested protobuf backend is fatal."""
+    monkeypatch.setenv("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION", "upb")
+    monkeypatch.setattr(server.api_implementation, "Type", lambda: "upb")
+    server.check_protobuf_backend()
+
+    monkeypatch.setattr(server.api_implementation, "Type", lambda: "python")
+    with pytest.raises(RuntimeError, match="python backend, not the requested upb"):
+        server.check_protobuf_backend()
+
+    # Nothing requested, nothing to enforce
+    monkeypatch.delenv("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION")
+    server.check_protobuf_backend()
+
+
 def test_load_model_resource_default():
     """Test loading the default prefix."""
     # Unset env var if it exists to test default
@@ -40,17 +58,23 @@ def test_load_model_resource_empty_env():
 
 def test_run_model_success():
     """Test successful model execution."""
-    # Ensure default prefix is used for consistency
-    if "MODEL_PREFIX" in os.environ:
-        del os.environ["MODEL_PREFIX"]
-    server.MODEL_PREFIX = server.load_model_resource()  # Reload prefix
-
     input_data = "hello world"
     expected_output = "MODEL_OUTPUT: HELLO WORLD"
     output = server.run_model(input_data)
     assert output == expected_output
 
 
+def test_run_model_caches_repeat_inputs():
+    """Test that repeat inputs are served from the transform cache."""
+    server._cached_transform.cache_clear()
+    first = server.run_model("cache me")
+    second = server.run_model("cache me")
+    assert first == second
+    info = server._cached_transform.cache_info()
+    assert info.misses == 1
+    assert info.hits == 1
+
+
 def test_run_model_empty_input():
     """Test model execution with empty input."""
     with pytest.raises(ValueError, match="Input data cannot be empty."):
@@ -60,15 +84,74 @@ def test_run_model_empty_input():
 # --- Integration Tests for gRPC Servicer --- #
 
 
+@contextlib.contextmanager
+def running_server(address):
+    """Run the asyncio gRPC server on ``address``, yielding the bound port.
+
+    The server runs on its own event loop in a background thread so the
+    blocking clients used by the tests below can talk to it.
+    """
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def start():
+        test_server = grpc.aio.server(options=server.SERVER_OPTIONS)
+        anops_pb2_grpc.add_AnOpsServicer_to_server(server.AnOpsServicer(), test_server)
+        port = test_server.add_insecure_port(address)
+        await test_server.start()
+        return test_server, port
+
+    test_server, port = asyncio.run_coroutine_threadsafe(start(), loop).result()
+    try:
+        yield port
+    finally:
+        asyncio.run_coroutine_threadsafe(test_server.stop(0), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
 # Fixture to set up and tear down the gRPC server for testing
 @pytest.fixture(scope="module")
 def grpc_server():
-    test_server = grpc.server(futures.ThreadPoolExecutor(max_workers=1))
-    anops_pb2_grpc.add_AnOpsServicer_to_server(server.AnOpsServicer(), test_server)
-    port = test_server.add_insecure_port("[::]:0")  # Use random available port
-    test_server.start()
-    yield f"localhost:{port}"  # Provide the server address to tests
-    test_server.stop(0)
+    with running_server("[::]:0") as port:  # Use random available port
+        yield f"localhost:{port}"  # Provide the server address to tests
+
+
+def test_server_options_are_known_to_grpc():
+    """Test that every server option is a channel arg gRPC core recognises.
+
+    gRPC silently ignores unknown args, so a misspelt key would leave the
+    server on its defaults. The recognised keys are compiled into cygrpc.
+    """
+    with open(grpc._cython.cygrpc.__file__, "rb") as f:
+        binary = f.read()
+    for key, _ in server.SERVER_OPTIONS:
+        assert key.encode() in binary, key
+
+
+def test_listen_addresses():
+    """Test parsing of MODEL_LISTEN values."""
+    assert server.listen_addresses("[::]:50051") == ["[::]:50051"]
+    assert server.listen_addresses("unix:///var/run/anops/anops.sock, [::]:50051") == [
+        "unix:///var/run/anops/anops.sock",
+        "[::]:50051",
+    ]
+    for spec in ("", " , ,"):
+        with pytest.raises(ValueError, match="no address"):
+            server.listen_addresses(spec)
+
+
+def test_predict_over_unix_socket(tmp_path):
+    """Test the Predict RPC over a Unix domain socket."""
+    address = f"unix://{tmp_path}/anops.sock"
+    with running_server(address):
+        with grpc.insecure_channel(address) as channel:
+            stub = anops_pb2_grpc.AnOpsStub(channel)
+            request = anops_pb2.PredictRequest(input_data="test input")
+            response = stub.Predict(request)
+    assert response.output_data == "MODEL_OUTPUT: TEST INPUT"
 
 
 def test_predict_success(grpc_server):
@@ -95,6 +178,40 @@ def test_predict_invalid_argument(grpc_server):
         assert "Invalid input: Input data cannot be empty." in rpc_error.value.details()
 
 
+def test_predict_batch(grpc_server):
+    """Test that a batch is answered by one PredictResponses, in order."""
+    batch = anops_pb2.PredictRequests(
+        requests=[
+            anops_pb2.PredictRequest(input_data="first"),
+            anops_pb2.PredictRequest(input_data=""),
+            anops_pb2.PredictRequest(input_data="third"),
+        ]
+    )
+    with grpc.insecure_channel(grpc_server) as channel:
+        stub = anops_pb2_grpc.AnOpsStub(channel)
+        response = stub.PredictBatch(batch)
+
+    first, empty, third = response.results
+    assert (first.code, first.output_data) == (0, "MODEL_OUTPUT: FIRST")
+    assert empty.code == grpc.StatusCode.INVALID_ARGUMENT.value[0]
+    assert "Input data cannot be empty." in empty.details
+    assert third.output_data == "MODEL_OUTPUT: THIRD"
+
+
+def test_predict_batch_internal_error(grpc_server):
+    """Test that unexpected model failures are reported per item."""
+    with mock.patch("server.run_model", side_effect=Exception("Simulated failure")):
+        with grpc.insecure_channel(grpc_server) as channel:
+            stub = anops_pb2_grpc.AnOpsStub(channel)
+            batch = anops_pb2.PredictRequests(
+                requests=[anops_pb2.PredictRequest(input_data="test input")]
+            )
+            response = stub.PredictBatch(batch)
+    (result,) = response.results
+    assert result.code == grpc.StatusCode.INTERNAL.value[0]
+    assert "Simulated failure" in result.details
+
+
 def test_predict_internal_error(grpc_server):
     """Test the Predict RPC call with internal server error."""
     # Patch run_model to raise a generic Exception